@@ -1,26 +1,41 @@
 #!/usr/bin/env python3
 
 import os
+import re
+import string
 import sys
 import yaml
-from collections import OrderedDict
 from datetime import datetime, timezone
 
-# Preserve YAML formatting
-class OrderedDumper(yaml.SafeDumper):
-    pass
+# Prefer the libyaml C bindings when available
+_Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+# Plain dicts keep insertion order, so sort_keys=False preserves YAML formatting
+_DumperBase = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
 
-def _dict_representer(dumper, data):
-    return dumper.represent_mapping(
-        yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
-        data.items()
-    )
+_BOOL_TRUE = frozenset({'true'})
+_BOOL_FALSE = frozenset({'false'})
 
-OrderedDumper.add_representer(OrderedDict, _dict_representer)
+# Env var names are ASCII, so translate() can lowercase them without
+# str.lower()'s Unicode case tables
+_LOWER_TABLE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# Splits a comma-separated value and strips the items in one pass
+_CSV_SPLIT = re.compile(r'\s*,\s*')
+
+# Leading letters that int()/float() can never accept ('inf'/'nan' aside)
+_NON_NUMERIC_START = frozenset(string.ascii_letters) - frozenset('iInN')
+
+# Keys from the image's own STORM_CONF_DIR/STORM_DATA_DIR/STORM_LOG_DIR,
+# which are always set and so do not count as overrides
+_PATH_KEYS = frozenset({'conf_dir', 'data_dir', 'log_dir'})
 
 # Track overridden keys
 overridden_keys = []
 
+# Parsed env configs keyed on (prefix, matching env items), so repeated
+# calls with an unchanged environment skip the parse
+_CONFIG_CACHE = {}
+
 def timestamp():
     """Get current UTC timestamp string."""
     return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
@@ -38,14 +53,21 @@ def env_to_storm_config(env_prefix="STORM_"):
     - STORM_UI__PORT=8080 -> ui.port: 8080
     - STORM_TOPOLOGY__MAX__SPOUT__PENDING=1000 -> topology.max.spout.pending: 1000
     """
+    # Filter before sorting so only the STORM_* subset is sorted
+    items = [(k, v) for k, v in os.environ.items() if k.startswith(env_prefix)]
+    items.sort()
+    
+    cache_key = (env_prefix, tuple(items))
+    cached = _CONFIG_CACHE.get(cache_key)
+    if cached is not None:
+        return list(cached)
+    
     configs = []
+    prefix_len = len(env_prefix)
     
-    for key, value in sorted(os.environ.items()):
-        if not key.startswith(env_prefix):
-            continue
-            
+    for key, value in items:
         # Remove prefix and convert to lowercase
-        config_key = key[len(env_prefix):].lower()
+        config_key = key[prefix_len:].translate(_LOWER_TABLE)
         
         # Skip Kubernetes service discovery variables
         if config_key.startswith('test_'):
@@ -58,7 +80,7 @@ def env_to_storm_config(env_prefix="STORM_"):
         if config_key in ['storm.zookeeper.servers', 'nimbus.seeds', 'supervisor.slots.ports']:
             # Always treat these as arrays, even if single value
             if ',' in value:
-                parsed_value = [item.strip() for item in value.split(',') if item.strip()]
+                parsed_value = [item for item in _CSV_SPLIT.split(value.strip()) if item]
             else:
                 parsed_value = [value] if value else []
             # For supervisor.slots.ports, convert to integers
@@ -70,7 +92,12 @@ def env_to_storm_config(env_prefix="STORM_"):
         # Store as a flat key-value pair
         configs.append((config_key, parsed_value))
     
-    return configs
+    # Return configs ordered by Storm key so callers can rely on that order
+    # (env names sort differently once '__' becomes '.' and case is folded)
+    configs.sort(key=lambda config: config[0])
+    
+    _CONFIG_CACHE[cache_key] = configs
+    return list(configs)
 
 def parse_value(value):
     """Parse environment variable value to appropriate type."""
@@ -78,24 +105,34 @@ def parse_value(value):
     if not value:
         return None
     
-    # Handle boolean values
-    if value.lower() in ('true', 'false'):
-        return value.lower() == 'true'
+    # Handle boolean values (no boolean literal is longer than 5 chars)
+    if len(value) <= 5:
+        lowered = value.lower()
+        if lowered in _BOOL_TRUE:
+            return True
+        if lowered in _BOOL_FALSE:
+            return False
     
     # Handle arrays (comma-separated)
     if ',' in value:
-        items = [item.strip() for item in value.split(',')]
+        items = _CSV_SPLIT.split(value.strip())
         # Try to parse each item
-        parsed_items = []
-        for item in items:
-            parsed_items.append(parse_single_value(item))
-        return parsed_items
+        return [parse_single_value(item) for item in items]
     
     # Handle single values
     return parse_single_value(value)
 
 def parse_single_value(value):
     """Parse a single value to appropriate type."""
+    # Fast paths that avoid the exception cascade for the common cases:
+    # plain port/count digits and hostname-like strings
+    if value.isascii():
+        digits = value[1:] if value[:1] == '-' else value
+        if digits.isdigit():
+            return int(value)
+        if value[:1] in _NON_NUMERIC_START:
+            return value
+    
     # Try integer
     try:
         return int(value)
@@ -111,79 +148,110 @@ def parse_single_value(value):
     # Return as string
     return value
 
-def get_nested_value(config, key_path):
-    """Get a value using flat dot notation (not nested)."""
-    # Storm uses flat keys with dots, not nested structure
-    return config.get(key_path, None)
-
-def set_nested_value(config, key, value):
-    """Set a value using flat dot notation (not nested)."""
-    # Storm expects flat keys with dots, not nested structure
+def set_nested_value(config, key, value, skip_if_incompatible=True):
+    """
+    Set a value using flat dot notation (not nested).
+    
+    Returns "set" if the value was written, or "skipped-list"/"skipped-dict"
+    when an existing list/dict would be overridden with a non-list/dict.
+    """
+    # Storm expects flat keys with dots, not nested structure.
+    # setdefault inserts new keys in a single dict operation.
+    existing_value = config.setdefault(key, value)
+    if existing_value is value:
+        return "set"
+    if skip_if_incompatible:
+        if isinstance(existing_value, list) and not isinstance(value, list):
+            return "skipped-list"
+        if isinstance(existing_value, dict) and not isinstance(value, dict):
+            return "skipped-dict"
     config[key] = value
+    return "set"
 
 
 def main():
     global overridden_keys
     config_file = os.environ.get('STORM_CONF_DIR', '/conf') + '/storm.yaml'
+    # The script runs once at container start, so one timestamp covers the run
+    ts = timestamp()
     
     try:
-        # Load existing config if it exists
-        base_config = OrderedDict()
-        if os.path.exists(config_file):
-            try:
-                with open(config_file, 'r') as f:
-                    loaded = yaml.safe_load(f)
-                    if loaded:
-                        base_config = OrderedDict(loaded)
-            except Exception as e:
-                print(f"[{timestamp()}] ERROR: Failed to load existing config: {e}", file=sys.stderr)
-                return 1
-    
         # Get config from environment
         env_configs = env_to_storm_config()
         
+        # Nothing beyond the image's directory vars to override, so leave an
+        # existing config file untouched
+        has_overrides = any(key not in _PATH_KEYS for key, _ in env_configs)
+        if not has_overrides and os.path.exists(config_file):
+            print(f"[{ts}] No STORM_* configuration overrides found, leaving {config_file} unchanged", file=sys.stderr)
+            return 0
+        
+        # Load existing config if it exists
+        base_config = {}
+        try:
+            # Hand libyaml the whole file as bytes rather than a text stream
+            with open(config_file, 'rb') as f:
+                data = f.read()
+            # Empty files need no parse at all
+            if data:
+                base_config = yaml.load(data, Loader=_Loader) or {}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[{ts}] ERROR: Failed to load existing config {config_file}: {e}", file=sys.stderr)
+            return 1
+        
         if env_configs:
-            print(f"[{timestamp()}] Processing {len(env_configs)} configuration(s) from environment variables", file=sys.stderr)
+            print(f"[{ts}] Processing {len(env_configs)} configuration(s) from environment variables", file=sys.stderr)
             
             # Reset overridden keys tracker
             overridden_keys = []
             
             # Apply each configuration
             for config_key, parsed_value in env_configs:
-                # Get existing value to check type compatibility
-                existing_value = get_nested_value(base_config, config_key)
-                
-                # Type check - warn if types don't match
-                if existing_value is not None:
-                    # Special case: if existing is a list/dict, don't override with non-list/dict
-                    if isinstance(existing_value, list) and not isinstance(parsed_value, list):
-                        print(f"[{timestamp()}] WARNING: Skipping '{config_key}' - cannot override list with {type(parsed_value).__name__}", file=sys.stderr)
-                        continue
-                    elif isinstance(existing_value, dict) and not isinstance(parsed_value, dict):
-                        print(f"[{timestamp()}] WARNING: Skipping '{config_key}' - cannot override dict with {type(parsed_value).__name__}", file=sys.stderr)
-                        continue
+                # Set the value, skipping list/dict values that would be
+                # overridden with an incompatible type
+                result = set_nested_value(base_config, config_key, parsed_value)
+                if result == "skipped-list":
+                    print(f"[{ts}] WARNING: Skipping '{config_key}' - cannot override list with {type(parsed_value).__name__}", file=sys.stderr)
+                    continue
+                elif result == "skipped-dict":
+                    print(f"[{ts}] WARNING: Skipping '{config_key}' - cannot override dict with {type(parsed_value).__name__}", file=sys.stderr)
+                    continue
                 
-                # Set the value and track override
-                set_nested_value(base_config, config_key, parsed_value)
+                # Track override
                 overridden_keys.append(config_key)
             
             # Report what was overridden
             if overridden_keys:
-                print(f"[{timestamp()}] Overridden configuration keys:", file=sys.stderr)
-                for key in sorted(overridden_keys):
-                    print(f"[{timestamp()}]   - {key}", file=sys.stderr)
+                lines = [f"[{ts}] Overridden configuration keys:"]
+                # env_configs is sorted by key, so overridden_keys already is
+                lines.extend(f"[{ts}]   - {key}" for key in overridden_keys)
+                sys.stderr.write("\n".join(lines) + "\n")
         else:
-            print(f"[{timestamp()}] No STORM_* environment variables found", file=sys.stderr)
+            print(f"[{ts}] No STORM_* environment variables found", file=sys.stderr)
         
-        # Write the config file
-        with open(config_file, 'w') as f:
-            yaml.dump(dict(base_config), f, Dumper=OrderedDumper, default_flow_style=False, sort_keys=False)
+        # Emit to bytes in one go and write the config file with a single write()
+        data = yaml.dump(base_config, Dumper=_DumperBase, default_flow_style=False, sort_keys=False, encoding='utf-8')
+        
+        # Write to a temp file and rename so a crash never leaves a truncated storm.yaml
+        tmp_file = config_file + '.tmp'
+        try:
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, config_file)
+        except Exception:
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+            raise
         
-        print(f"[{timestamp()}] Storm configuration written to {config_file}", file=sys.stderr)
+        print(f"[{ts}] Storm configuration written to {config_file}", file=sys.stderr)
         return 0
         
     except Exception as e:
-        print(f"[{timestamp()}] ERROR: Unexpected error while processing configuration: {e}", file=sys.stderr)
+        print(f"[{ts}] ERROR: Unexpected error while processing configuration: {e}", file=sys.stderr)
         return 1
 
 if __name__ == "__main__":
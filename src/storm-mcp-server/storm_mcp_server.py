@@ -10,9 +10,13 @@ This MCP server provides comprehensive Apache Storm expertise including:
 """
 
 import asyncio
-import json
 import logging
-from typing import Any, Dict, List, Optional, Union, Sequence
+import operator
+import socket
+import string
+import threading
+import time
+from typing import Any, Dict, Final, Iterator, List, Optional, Union, Sequence
 
 # MCP imports
 from mcp.server import Server
@@ -23,7 +27,7 @@ import mcp.types as types
 # Thrift imports for Storm API
 try:
     from thrift.transport import TSocket, TTransport
-    from thrift.protocol import TBinaryProtocol
+    from thrift.protocol import TBinaryProtocol, TCompactProtocol
     from thrift.transport.TTransport import TFramedTransport
     THRIFT_AVAILABLE = True
 except ImportError:
@@ -47,17 +51,97 @@ except ImportError as e:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("storm-mcp-server")
 
+# TopologySummary fields reported by get_cluster_info, fetched in one C call
+_TOPO_KEYS = ("name", "id", "status", "num_workers", "num_executors", "num_tasks", "uptime_secs")
+_TOPO_GETTER = operator.attrgetter(*_TOPO_KEYS)
+
+
+if THRIFT_AVAILABLE:
+    class ZeroCopyBinaryProtocol(TBinaryProtocol.TBinaryProtocolAccelerated):
+        """
+        TBinaryProtocol that decodes strings straight out of the current frame
+        
+        As a TBinaryProtocolAccelerated, generated structs are decoded by
+        thrift's C ``fastbinary`` module when it is installed; the Python
+        methods below are only used when it is not.
+        
+        TFramedTransport already holds each response frame in a single buffer
+        (exposed as ``cstringio_buf``). Instead of copying every string field
+        into its own bytes object and then decoding it, slice a memoryview of
+        the frame and decode from that, so each topology name/id/status costs
+        one allocation instead of two.
+        """
+        
+        def readString(self):
+            buf = getattr(self.trans, "cstringio_buf", None)
+            if buf is None:
+                return super().readString()
+            
+            size = self.readI32()
+            self._check_string_length(size)
+            pos = buf.tell()
+            with buf.getbuffer() as frame:
+                if pos + size <= frame.nbytes:
+                    with frame[pos:pos + size] as view:
+                        value = str(view, "utf-8")
+                    buf.seek(pos + size)
+                    return value
+            # String not fully inside the buffered frame; read it normally
+            return self.trans.readAll(size).decode("utf-8")
+
 
 class StormThriftClient:
     """
     Handles thrift connections to Storm Nimbus for cluster operations
+    
+    The wire protocol is selected with ``protocol``: "binary" (the default)
+    matches a stock Nimbus thrift server, while "compact" uses TCompactProtocol
+    for a smaller encoding of large cluster summaries and requires a Nimbus
+    endpoint (or thrift proxy) configured to speak the compact protocol.
     """
     
-    def __init__(self, nimbus_host: str = "localhost", nimbus_port: int = 6627):
+    # Fixed attribute set: no per-instance __dict__, faster attribute access
+    __slots__ = ("nimbus_host", "nimbus_port", "protocol", "max_frame_bytes",
+                 "recv_buf_bytes", "client", "transport", "_cache", "_cache_ts",
+                 "_cache_ttl", "_lock")
+    
+    PROTOCOLS = ("binary", "compact")
+    
+    # Large clusters return getClusterInfo frames beyond thrift's 16 MB default
+    DEFAULT_MAX_FRAME_BYTES = 64 * 1024 * 1024
+    DEFAULT_RECV_BUF_BYTES = 64 * 1024
+    
+    # TCP keepalive for the long-lived Nimbus connection (seconds / probes)
+    KEEPALIVE_IDLE = 60
+    KEEPALIVE_INTERVAL = 10
+    KEEPALIVE_COUNT = 3
+    
+    def __init__(self, nimbus_host: str = "localhost", nimbus_port: int = 6627,
+                 cache_ttl: float = 2.0, protocol: str = "binary",
+                 max_frame_bytes: int = DEFAULT_MAX_FRAME_BYTES,
+                 recv_buf_bytes: int = DEFAULT_RECV_BUF_BYTES):
+        if protocol not in self.PROTOCOLS:
+            raise ValueError(f"Unknown thrift protocol: {protocol}")
         self.nimbus_host = nimbus_host
         self.nimbus_port = nimbus_port
+        self.protocol = protocol
+        self.max_frame_bytes = max_frame_bytes
+        self.recv_buf_bytes = recv_buf_bytes
         self.client = None
         self.transport = None
+        # Short-lived getClusterInfo cache; consistency is not critical and
+        # bursts of tool calls would otherwise each hit Nimbus and ZooKeeper
+        self._cache: Optional[Dict[str, Any]] = None
+        self._cache_ts = 0.0
+        self._cache_ttl = cache_ttl
+        # Thrift's NimbusClient is not thread-safe and calls run in worker
+        # threads, so all access to client/transport goes through this lock
+        self._lock = threading.RLock()
+    
+    def _invalidate_cache(self):
+        """Drop any cached cluster info"""
+        self._cache = None
+        self._cache_ts = 0.0
         
     def connect(self) -> bool:
         """Establish connection to Storm Nimbus"""
@@ -65,398 +149,326 @@ class StormThriftClient:
             logger.error("Thrift libraries not available")
             return False
             
-        try:
-            # Create transport and protocol
-            socket = TSocket.TSocket(self.nimbus_host, self.nimbus_port)
-            self.transport = TFramedTransport(socket)
-            protocol = TBinaryProtocol.TBinaryProtocol(self.transport)
-            self.client = NimbusClient(protocol)
-            
-            # Open connection
-            self.transport.open()
-            logger.info(f"Connected to Storm Nimbus at {self.nimbus_host}:{self.nimbus_port}")
-            return True
+        with self._lock:
+            # Drop any previous connection before opening a new one
+            if self.transport:
+                self.transport.close()
             
-        except Exception as e:
-            logger.error(f"Failed to connect to Nimbus: {e}")
-            return False
+            try:
+                # Create transport and protocol
+                tsocket = TSocket.TSocket(self.nimbus_host, self.nimbus_port)
+                # Buffer socket reads so each frame is pulled in large chunks
+                buffered = TTransport.TBufferedTransport(tsocket, rbuf_size=self.recv_buf_bytes)
+                try:
+                    self.transport = TFramedTransport(buffered, max_frame_size=self.max_frame_bytes)
+                except TypeError:
+                    # thrift < 0.25 has no frame size limit to configure
+                    self.transport = TFramedTransport(buffered)
+                if self.protocol == "compact":
+                    protocol = TCompactProtocol.TCompactProtocolAccelerated(self.transport)
+                else:
+                    protocol = ZeroCopyBinaryProtocol(self.transport)
+                self.client = NimbusClient(protocol)
+                
+                # Open connection
+                self.transport.open()
+                self._enable_keepalive(tsocket.handle)
+                self._invalidate_cache()
+                logger.info("Connected to Storm Nimbus at %s:%s", self.nimbus_host, self.nimbus_port)
+                return True
+                
+            except Exception as e:
+                logger.error("Failed to connect to Nimbus: %s", e)
+                return False
+    
+    def ensure_connected(self, nimbus_host: Optional[str] = None,
+                         nimbus_port: Optional[int] = None) -> bool:
+        """
+        Reuse the open Nimbus connection, connecting only if needed
+        
+        Passing a different nimbus_host/nimbus_port switches the client to
+        that Nimbus. The old connection is closed, the target updated, the
+        cache cleared and the new connection opened under one lock, so a
+        concurrent get_cluster_info never reconnects to the old target.
+        """
+        with self._lock:
+            target = (nimbus_host if nimbus_host is not None else self.nimbus_host,
+                      nimbus_port if nimbus_port is not None else self.nimbus_port)
+            if target != (self.nimbus_host, self.nimbus_port):
+                self.disconnect()
+                self.nimbus_host, self.nimbus_port = target
+                self._invalidate_cache()
+            elif self.transport and self.transport.isOpen():
+                return True
+            return self.connect()
+    
+    def _enable_keepalive(self, sock: Optional[socket.socket]):
+        """Enable TCP keepalive so a dead Nimbus connection is detected"""
+        if sock is None:
+            return
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # Fine-grained keepalive timers are platform specific (Linux)
+        for option, value in (("TCP_KEEPIDLE", self.KEEPALIVE_IDLE),
+                              ("TCP_KEEPINTVL", self.KEEPALIVE_INTERVAL),
+                              ("TCP_KEEPCNT", self.KEEPALIVE_COUNT)):
+            if hasattr(socket, option):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
     
     def disconnect(self):
         """Close connection to Storm Nimbus"""
-        if self.transport:
-            self.transport.close()
-            logger.info("Disconnected from Storm Nimbus")
+        with self._lock:
+            if self.transport:
+                self.transport.close()
+                self._invalidate_cache()
+                logger.info("Disconnected from Storm Nimbus")
     
     def get_cluster_info(self) -> Dict[str, Any]:
         """Get Storm cluster information"""
+        summary = self.get_cluster_summary()
+        if "error" in summary:
+            return summary
+        return {
+            "supervisors": summary["supervisors"],
+            "nimbus_uptime": summary["nimbus_uptime"],
+            "topologies": [
+                dict(zip(_TOPO_KEYS, _TOPO_GETTER(topo)))
+                for topo in summary["topologies"]
+            ]
+        }
+    
+    def get_cluster_summary(self) -> Dict[str, Any]:
+        """
+        Get Storm cluster information, served from cache within the TTL
+        
+        Unlike get_cluster_info, "topologies" holds the thrift TopologySummary
+        structs as returned by Nimbus, for use with iter_topology_lines.
+        """
         if not self.client:
             return {"error": "Not connected to Nimbus"}
+        
+        # Concurrent callers wait here and share a single RPC
+        with self._lock:
+            if self._cache is not None and time.monotonic() - self._cache_ts < self._cache_ttl:
+                return self._cache
             
+            result = self._fetch_cluster_info()
+            if "error" not in result:
+                self._cache = result
+                self._cache_ts = time.monotonic()
+            return result
+    
+    def _fetch_cluster_info(self) -> Dict[str, Any]:
+        """Fetch Storm cluster information from Nimbus"""
         try:
-            cluster_info = self.client.getClusterInfo()
+            try:
+                cluster_info = self.client.getClusterInfo()
+            except TTransport.TTransportException as e:
+                # The persistent connection went stale; reconnect and retry once
+                logger.warning("Nimbus connection lost (%s), reconnecting", e)
+                if not self.connect():
+                    return {"error": f"Failed to get cluster info: {e}"}
+                cluster_info = self.client.getClusterInfo()
             return {
                 "supervisors": len(cluster_info.supervisors),
                 "nimbus_uptime": cluster_info.nimbus_uptime_secs,
-                "topologies": [
-                    {
-                        "name": topo.name,
-                        "id": topo.id,
-                        "status": topo.status,
-                        "num_workers": topo.num_workers,
-                        "num_executors": topo.num_executors,
-                        "num_tasks": topo.num_tasks,
-                        "uptime_secs": topo.uptime_secs
-                    }
-                    for topo in cluster_info.topologies
-                ]
+                "topologies": cluster_info.topologies
             }
         except Exception as e:
             return {"error": f"Failed to get cluster info: {e}"}
-
-
-class StormExpertServer:
-    """
-    Main MCP server class providing Storm expertise
-    """
-    
-    def __init__(self):
-        self.server = Server("storm-expert")
-        self.storm_client = None
-        self.setup_handlers()
-    
-    def setup_handlers(self):
-        """Set up MCP server handlers"""
-        
-        @self.server.list_tools()
-        async def handle_list_tools() -> List[types.Tool]:
-            """List available Storm tools"""
-            return [
-                types.Tool(
-                    name="connect_storm_cluster",
-                    description="Connect to a Storm cluster via Thrift API",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "nimbus_host": {
-                                "type": "string",
-                                "description": "Nimbus host address",
-                                "default": "localhost"
-                            },
-                            "nimbus_port": {
-                                "type": "integer",
-                                "description": "Nimbus port",
-                                "default": 6627
-                            }
-                        }
-                    }
-                ),
-                types.Tool(
-                    name="get_cluster_info",
-                    description="Get Storm cluster information including supervisors and topologies",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {}
-                    }
-                ),
-                types.Tool(
-                    name="storm_troubleshoot",
-                    description="Provide troubleshooting guidance for Storm issues",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "issue_type": {
-                                "type": "string",
-                                "description": "Type of issue (performance, connectivity, topology, etc.)"
-                            },
-                            "symptoms": {
-                                "type": "string",
-                                "description": "Description of observed symptoms"
-                            }
-                        },
-                        "required": ["issue_type", "symptoms"]
-                    }
-                ),
-                types.Tool(
-                    name="storm_best_practices",
-                    description="Get Storm development and deployment best practices",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "category": {
-                                "type": "string",
-                                "description": "Category of best practices (topology_design, performance, reliability, etc.)"
-                            }
-                        },
-                        "required": ["category"]
-                    }
-                ),
-                types.Tool(
-                    name="generate_storm_topology",
-                    description="Generate sample Storm topology code based on requirements",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "topology_type": {
-                                "type": "string",
-                                "description": "Type of topology (word_count, real_time_analytics, stream_processing, etc.)"
-                            },
-                            "language": {
-                                "type": "string",
-                                "description": "Programming language (Java, Python, Scala)",
-                                "default": "Java"
-                            },
-                            "requirements": {
-                                "type": "string",
-                                "description": "Specific requirements for the topology"
-                            }
-                        },
-                        "required": ["topology_type"]
-                    }
-                )
-            ]
-        
-        @self.server.call_tool()
-        async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
-            """Handle tool calls"""
-            
-            if name == "connect_storm_cluster":
-                return await self._connect_storm_cluster(arguments)
-            elif name == "get_cluster_info":
-                return await self._get_cluster_info()
-            elif name == "storm_troubleshoot":
-                return await self._storm_troubleshoot(arguments)
-            elif name == "storm_best_practices":
-                return await self._storm_best_practices(arguments)
-            elif name == "generate_storm_topology":
-                return await self._generate_storm_topology(arguments)
-            else:
-                raise ValueError(f"Unknown tool: {name}")
-    
-    async def _connect_storm_cluster(self, arguments: Dict[str, Any]) -> List[types.TextContent]:
-        """Connect to Storm cluster"""
-        nimbus_host = arguments.get("nimbus_host", "localhost")
-        nimbus_port = arguments.get("nimbus_port", 6627)
-        
-        self.storm_client = StormThriftClient(nimbus_host, nimbus_port)
-        
-        if self.storm_client.connect():
-            return [types.TextContent(
-                type="text",
-                text=f"✅ Successfully connected to Storm cluster at {nimbus_host}:{nimbus_port}"
-            )]
-        else:
-            return [types.TextContent(
-                type="text",
-                text=f"❌ Failed to connect to Storm cluster at {nimbus_host}:{nimbus_port}. Make sure Storm Nimbus is running and thrift bindings are available."
-            )]
     
-    async def _get_cluster_info(self) -> List[types.TextContent]:
-        """Get cluster information"""
-        if not self.storm_client:
-            return [types.TextContent(
-                type="text",
-                text="❌ Not connected to Storm cluster. Use connect_storm_cluster first."
-            )]
-        
-        cluster_info = self.storm_client.get_cluster_info()
-        
-        if "error" in cluster_info:
-            return [types.TextContent(
-                type="text",
-                text=f"❌ Error getting cluster info: {cluster_info['error']}"
-            )]
-        
-        # Format cluster information
-        result = f"""🌩️ **Storm Cluster Information**
-
-**Cluster Overview:**
-- Supervisors: {cluster_info['supervisors']}
-- Nimbus Uptime: {cluster_info['nimbus_uptime']} seconds
-
-**Active Topologies ({len(cluster_info['topologies'])}):**
+    @staticmethod
+    def iter_topology_lines(topologies: Sequence[Any]) -> Iterator[str]:
+        """Yield the Markdown block for each thrift TopologySummary"""
+        for topo in topologies:
+            yield f"""
+- **{topo.name}** ({topo.id})
+  - Status: {topo.status}
+  - Workers: {topo.num_workers}
+  - Executors: {topo.num_executors}
+  - Tasks: {topo.num_tasks}
+  - Uptime: {topo.uptime_secs} seconds
 """
-        
-        for topo in cluster_info['topologies']:
-            result += f"""
-- **{topo['name']}** ({topo['id']})
-  - Status: {topo['status']}
-  - Workers: {topo['num_workers']}
-  - Executors: {topo['num_executors']}
-  - Tasks: {topo['num_tasks']}
-  - Uptime: {topo['uptime_secs']} seconds
-"""
-        
-        return [types.TextContent(type="text", text=result)]
-    
-    async def _storm_troubleshoot(self, arguments: Dict[str, Any]) -> List[types.TextContent]:
-        """Provide troubleshooting guidance"""
-        issue_type = arguments["issue_type"].lower()
-        symptoms = arguments["symptoms"]
-        
-        troubleshooting_guide = {
-            "performance": {
-                "title": "🚀 Storm Performance Issues",
-                "common_causes": [
-                    "Insufficient parallelism configuration",
-                    "Bolt processing slower than spout emission rate",
-                    "Network bottlenecks between nodes",
-                    "Garbage collection issues",
-                    "Serialization overhead"
-                ],
-                "solutions": [
-                    "Increase parallelism hint for slow components",
-                    "Use fields grouping to ensure load balancing",
-                    "Monitor and tune JVM heap settings",
-                    "Optimize serialization with Kryo",
-                    "Use multiple workers per topology",
-                    "Check for data skew in groupings"
-                ]
-            },
-            "connectivity": {
-                "title": "🔌 Storm Connectivity Issues",
-                "common_causes": [
-                    "ZooKeeper connection problems",
-                    "Network firewall blocking ports",
-                    "Nimbus not accessible from workers",
-                    "Supervisor connection issues"
-                ],
-                "solutions": [
-                    "Check ZooKeeper cluster status",
-                    "Verify storm.zookeeper.servers configuration",
-                    "Ensure ports 6627 (Nimbus) and 6700-6703 (Workers) are open",
-                    "Check nimbus.host configuration on supervisors",
-                    "Verify network connectivity between nodes"
-                ]
-            },
-            "topology": {
-                "title": "⚡ Storm Topology Issues",
-                "common_causes": [
-                    "Unbalanced topology parallelism",
-                    "Tuple processing failures",
-                    "Memory leaks in bolts",
-                    "Acker bottlenecks"
-                ],
-                "solutions": [
-                    "Review and adjust parallelism configuration",
-                    "Implement proper error handling in bolts",
-                    "Use tuple anchoring and acking correctly",
-                    "Monitor topology metrics via Storm UI",
-                    "Consider disabling acking for high-throughput scenarios"
-                ]
-            }
-        }
-        
-        guide = troubleshooting_guide.get(issue_type, {
-            "title": "🔍 General Storm Troubleshooting",
-            "common_causes": ["Various system and configuration issues"],
-            "solutions": ["Check Storm UI for metrics", "Review logs for error messages", "Verify cluster configuration"]
-        })
-        
-        result = f"""{guide['title']}
 
-**Symptoms:** {symptoms}
 
-**Common Causes:**
-"""
-        for cause in guide['common_causes']:
-            result += f"• {cause}\n"
-        
-        result += "\n**Recommended Solutions:**\n"
-        for solution in guide['solutions']:
-            result += f"• {solution}\n"
-        
-        result += """
+# Static guidance served by storm_troubleshoot and storm_best_practices
+_TROUBLESHOOTING_GUIDE = {
+    "performance": {
+        "title": "🚀 Storm Performance Issues",
+        "common_causes": [
+            "Insufficient parallelism configuration",
+            "Bolt processing slower than spout emission rate",
+            "Network bottlenecks between nodes",
+            "Garbage collection issues",
+            "Serialization overhead"
+        ],
+        "solutions": [
+            "Increase parallelism hint for slow components",
+            "Use fields grouping to ensure load balancing",
+            "Monitor and tune JVM heap settings",
+            "Optimize serialization with Kryo",
+            "Use multiple workers per topology",
+            "Check for data skew in groupings"
+        ]
+    },
+    "connectivity": {
+        "title": "🔌 Storm Connectivity Issues",
+        "common_causes": [
+            "ZooKeeper connection problems",
+            "Network firewall blocking ports",
+            "Nimbus not accessible from workers",
+            "Supervisor connection issues"
+        ],
+        "solutions": [
+            "Check ZooKeeper cluster status",
+            "Verify storm.zookeeper.servers configuration",
+            "Ensure ports 6627 (Nimbus) and 6700-6703 (Workers) are open",
+            "Check nimbus.host configuration on supervisors",
+            "Verify network connectivity between nodes"
+        ]
+    },
+    "topology": {
+        "title": "⚡ Storm Topology Issues",
+        "common_causes": [
+            "Unbalanced topology parallelism",
+            "Tuple processing failures",
+            "Memory leaks in bolts",
+            "Acker bottlenecks"
+        ],
+        "solutions": [
+            "Review and adjust parallelism configuration",
+            "Implement proper error handling in bolts",
+            "Use tuple anchoring and acking correctly",
+            "Monitor topology metrics via Storm UI",
+            "Consider disabling acking for high-throughput scenarios"
+        ]
+    }
+}
+
+_DEFAULT_TROUBLESHOOTING_GUIDE = {
+    "title": "🔍 General Storm Troubleshooting",
+    "common_causes": ["Various system and configuration issues"],
+    "solutions": ["Check Storm UI for metrics", "Review logs for error messages", "Verify cluster configuration"]
+}
+
+_BEST_PRACTICES = {
+    "topology_design": {
+        "title": "🏗️ Storm Topology Design Best Practices",
+        "practices": [
+            "Keep bolt processing logic simple and fast",
+            "Use appropriate stream groupings (fields, shuffle, all)",
+            "Design for idempotency when possible",
+            "Minimize state in bolts",
+            "Use Trident for exactly-once processing needs",
+            "Plan parallelism based on expected throughput",
+            "Consider data locality in grouping decisions"
+        ]
+    },
+    "performance": {
+        "title": "⚡ Storm Performance Best Practices", 
+        "practices": [
+            "Tune topology parallelism carefully",
+            "Use Kryo serialization for better performance",
+            "Batch operations where possible",
+            "Avoid blocking operations in bolts",
+            "Use multiple workers per topology",
+            "Monitor and tune JVM settings",
+            "Consider disabling acking for high-throughput scenarios",
+            "Use local mode for development and testing"
+        ]
+    },
+    "reliability": {
+        "title": "🛡️ Storm Reliability Best Practices",
+        "practices": [
+            "Implement proper tuple anchoring and acking",
+            "Handle failures gracefully with try-catch blocks",
+            "Use replay mechanisms for critical data",
+            "Monitor topology health with metrics",
+            "Set appropriate timeouts for processing",
+            "Use transactional topologies for guaranteed processing",
+            "Implement circuit breakers for external dependencies",
+            "Plan for node failures and recovery"
+        ]
+    },
+    "monitoring": {
+        "title": "📊 Storm Monitoring Best Practices",
+        "practices": [
+            "Use Storm UI for real-time monitoring",
+            "Set up JMX monitoring for detailed metrics",
+            "Monitor tuple flow rates and latencies",
+            "Track error rates and failed tuples",
+            "Use external monitoring tools (Ganglia, Graphite)",
+            "Set up alerting for topology failures",
+            "Log important events and errors",
+            "Monitor resource utilization (CPU, memory, network)"
+        ]
+    }
+}
+
+_DEFAULT_BEST_PRACTICES = {
+    "title": "📋 General Storm Best Practices",
+    "practices": [
+        "Follow the official Storm documentation",
+        "Test topologies thoroughly in local mode",
+        "Plan for scalability from the beginning",
+        "Keep configurations in version control"
+    ]
+}
+
+_TROUBLESHOOTING_RESOURCES = """
 **Additional Resources:**
 • Storm UI: http://nimbus-host:8080
 • Check logs: storm logs
 • Monitor with JMX/Ganglia
 • Use storm rebalance for runtime adjustments
 """
-        
-        return [types.TextContent(type="text", text=result)]
-    
-    async def _storm_best_practices(self, arguments: Dict[str, Any]) -> List[types.TextContent]:
-        """Provide best practices guidance"""
-        category = arguments["category"].lower()
-        
-        best_practices = {
-            "topology_design": {
-                "title": "🏗️ Storm Topology Design Best Practices",
-                "practices": [
-                    "Keep bolt processing logic simple and fast",
-                    "Use appropriate stream groupings (fields, shuffle, all)",
-                    "Design for idempotency when possible",
-                    "Minimize state in bolts",
-                    "Use Trident for exactly-once processing needs",
-                    "Plan parallelism based on expected throughput",
-                    "Consider data locality in grouping decisions"
-                ]
-            },
-            "performance": {
-                "title": "⚡ Storm Performance Best Practices", 
-                "practices": [
-                    "Tune topology parallelism carefully",
-                    "Use Kryo serialization for better performance",
-                    "Batch operations where possible",
-                    "Avoid blocking operations in bolts",
-                    "Use multiple workers per topology",
-                    "Monitor and tune JVM settings",
-                    "Consider disabling acking for high-throughput scenarios",
-                    "Use local mode for development and testing"
-                ]
-            },
-            "reliability": {
-                "title": "🛡️ Storm Reliability Best Practices",
-                "practices": [
-                    "Implement proper tuple anchoring and acking",
-                    "Handle failures gracefully with try-catch blocks",
-                    "Use replay mechanisms for critical data",
-                    "Monitor topology health with metrics",
-                    "Set appropriate timeouts for processing",
-                    "Use transactional topologies for guaranteed processing",
-                    "Implement circuit breakers for external dependencies",
-                    "Plan for node failures and recovery"
-                ]
-            },
-            "monitoring": {
-                "title": "📊 Storm Monitoring Best Practices",
-                "practices": [
-                    "Use Storm UI for real-time monitoring",
-                    "Set up JMX monitoring for detailed metrics",
-                    "Monitor tuple flow rates and latencies",
-                    "Track error rates and failed tuples",
-                    "Use external monitoring tools (Ganglia, Graphite)",
-                    "Set up alerting for topology failures",
-                    "Log important events and errors",
-                    "Monitor resource utilization (CPU, memory, network)"
-                ]
-            }
-        }
-        
-        practices = best_practices.get(category, {
-            "title": "📋 General Storm Best Practices",
-            "practices": [
-                "Follow the official Storm documentation",
-                "Test topologies thoroughly in local mode",
-                "Plan for scalability from the beginning",
-                "Keep configurations in version control"
-            ]
-        })
-        
-        result = f"{practices['title']}\n\n"
-        for i, practice in enumerate(practices['practices'], 1):
-            result += f"{i}. {practice}\n"
-        
-        return [types.TextContent(type="text", text=result)]
-    
-    async def _generate_storm_topology(self, arguments: Dict[str, Any]) -> List[types.TextContent]:
-        """Generate sample Storm topology code"""
-        topology_type = arguments["topology_type"].lower()
-        language = arguments.get("language", "Java").lower()
-        requirements = arguments.get("requirements", "")
-        
-        if language == "java" and topology_type == "word_count":
-            code = '''// Word Count Storm Topology Example
+
+
+def _join_bullets(items: List[str]) -> str:
+    """Render items as a "• " bullet list, one per line"""
+    return "".join(f"• {item}\n" for item in items)
+
+
+def _render_troubleshooting(guide: Dict[str, Any]) -> tuple:
+    """Pre-render a troubleshooting guide as (header, body) around the symptoms"""
+    causes = _join_bullets(guide["common_causes"])
+    solutions = _join_bullets(guide["solutions"])
+    header = f"{guide['title']}\n\n**Symptoms:** "
+    body = (f"\n\n**Common Causes:**\n{causes}"
+            f"\n**Recommended Solutions:**\n{solutions}"
+            f"{_TROUBLESHOOTING_RESOURCES}")
+    return header, body
+
+
+def _render_best_practices(practices: Dict[str, Any]) -> str:
+    """Pre-render a best practices guide as a numbered list"""
+    items = "".join(f"{i}. {practice}\n" for i, practice in enumerate(practices["practices"], 1))
+    return f"{practices['title']}\n\n{items}"
+
+
+def _lookup_case_insensitive(mapping: Dict[str, Any], key: str, default: Any) -> Any:
+    """Look up a lowercase-keyed mapping, lowercasing the key only on a miss"""
+    value = mapping.get(key)
+    if value is None:
+        value = mapping.get(key.lower(), default)
+    return value
+
+
+# The guides are static, so render them once at import time
+_TROUBLESHOOTING_RENDERED = {
+    issue_type: _render_troubleshooting(guide)
+    for issue_type, guide in _TROUBLESHOOTING_GUIDE.items()
+}
+_DEFAULT_TROUBLESHOOTING_RENDERED = _render_troubleshooting(_DEFAULT_TROUBLESHOOTING_GUIDE)
+
+_BEST_PRACTICES_RENDERED = {
+    category: _render_best_practices(practices)
+    for category, practices in _BEST_PRACTICES.items()
+}
+_DEFAULT_BEST_PRACTICES_RENDERED = _render_best_practices(_DEFAULT_BEST_PRACTICES)
+
+
+# Sample topology sources served by generate_storm_topology
+_WORDCOUNT_JAVA: Final[str] = '''// Word Count Storm Topology Example
 import org.apache.storm.Config;
 import org.apache.storm.LocalCluster;
 import org.apache.storm.StormSubmitter;
@@ -568,31 +580,30 @@ public class WordCountTopology {
         }
     }
 }'''
-        else:
-            # Generic template
-            code = f'''// Generic {topology_type.title()} Storm Topology Template ({language.title()})
+
+_GENERIC_TOPOLOGY_TEMPLATE = string.Template('''// Generic ${title} Storm Topology Template (${language})
 
 /**
- * Requirements: {requirements}
+ * Requirements: ${requirements}
  *
- * This is a template for a {topology_type} topology.
+ * This is a template for a ${topology_type} topology.
  * Customize the spouts and bolts according to your specific needs.
  */
 
-public class {topology_type.title().replace('_', '')}Topology {{
+public class ${class_name}Topology {
     
     // Define your spout class
-    public static class DataSpout extends BaseRichSpout {{
+    public static class DataSpout extends BaseRichSpout {
         // Implement spout logic here
-    }}
+    }
     
     // Define your bolt classes
-    public static class ProcessingBolt extends BaseBasicBolt {{
+    public static class ProcessingBolt extends BaseBasicBolt {
         // Implement bolt logic here
-    }}
+    }
     
     // Main topology definition
-    public static void main(String[] args) throws Exception {{
+    public static void main(String[] args) throws Exception {
         TopologyBuilder builder = new TopologyBuilder();
         
         // Configure topology
@@ -602,14 +613,234 @@ public class {topology_type.title().replace('_', '')}Topology {{
         
         // Submit topology
         Config config = new Config();
-        if (args != null && args.length > 0) {{
+        if (args != null && args.length > 0) {
             StormSubmitter.submitTopology(args[0], config, builder.createTopology());
-        }} else {{
+        } else {
             LocalCluster cluster = new LocalCluster();
-            cluster.submitTopology("{topology_type}", config, builder.createTopology());
-        }}
-    }}
-}}'''
+            cluster.submitTopology("${topology_type}", config, builder.createTopology());
+        }
+    }
+}''')
+
+
+class StormExpertServer:
+    """
+    Main MCP server class providing Storm expertise
+    """
+    
+    __slots__ = ("server", "storm_client", "_tools", "_dispatch")
+    
+    def __init__(self):
+        self.server = Server("storm-expert")
+        self.storm_client = None
+        # The tool definitions never change, so build them once
+        self._tools = self._build_tools()
+        self.setup_handlers()
+    
+    def _build_tools(self) -> List[types.Tool]:
+        """Build the Storm tool definitions"""
+        return [
+            types.Tool(
+                name="connect_storm_cluster",
+                description="Connect to a Storm cluster via Thrift API",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "nimbus_host": {
+                            "type": "string",
+                            "description": "Nimbus host address",
+                            "default": "localhost"
+                        },
+                        "nimbus_port": {
+                            "type": "integer",
+                            "description": "Nimbus port",
+                            "default": 6627
+                        }
+                    }
+                }
+            ),
+            types.Tool(
+                name="get_cluster_info",
+                description="Get Storm cluster information including supervisors and topologies",
+                inputSchema={
+                    "type": "object",
+                    "properties": {}
+                }
+            ),
+            types.Tool(
+                name="storm_troubleshoot",
+                description="Provide troubleshooting guidance for Storm issues",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "issue_type": {
+                            "type": "string",
+                            "description": "Type of issue (performance, connectivity, topology, etc.)"
+                        },
+                        "symptoms": {
+                            "type": "string",
+                            "description": "Description of observed symptoms"
+                        }
+                    },
+                    "required": ["issue_type", "symptoms"]
+                }
+            ),
+            types.Tool(
+                name="storm_best_practices",
+                description="Get Storm development and deployment best practices",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "category": {
+                            "type": "string",
+                            "description": "Category of best practices (topology_design, performance, reliability, etc.)"
+                        }
+                    },
+                    "required": ["category"]
+                }
+            ),
+            types.Tool(
+                name="generate_storm_topology",
+                description="Generate sample Storm topology code based on requirements",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "topology_type": {
+                            "type": "string",
+                            "description": "Type of topology (word_count, real_time_analytics, stream_processing, etc.)"
+                        },
+                        "language": {
+                            "type": "string",
+                            "description": "Programming language (Java, Python, Scala)",
+                            "default": "Java"
+                        },
+                        "requirements": {
+                            "type": "string",
+                            "description": "Specific requirements for the topology"
+                        }
+                    },
+                    "required": ["topology_type"]
+                }
+            )
+        ]
+    
+    def setup_handlers(self):
+        """Set up MCP server handlers"""
+        
+        @self.server.list_tools()
+        async def handle_list_tools() -> List[types.Tool]:
+            """List available Storm tools"""
+            return self._tools
+        
+        # Tool name -> handler taking the call arguments
+        self._dispatch = {
+            "connect_storm_cluster": self._connect_storm_cluster,
+            "get_cluster_info": lambda arguments: self._get_cluster_info(),
+            "storm_troubleshoot": self._storm_troubleshoot,
+            "storm_best_practices": self._storm_best_practices,
+            "generate_storm_topology": self._generate_storm_topology,
+        }
+        
+        @self.server.call_tool()
+        async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
+            """Handle tool calls"""
+            handler = self._dispatch.get(name)
+            if handler is None:
+                raise ValueError(f"Unknown tool: {name}")
+            return await handler(arguments)
+    
+    async def _connect_storm_cluster(self, arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """Connect to Storm cluster"""
+        nimbus_host = arguments.get("nimbus_host", "localhost")
+        nimbus_port = arguments.get("nimbus_port", 6627)
+        
+        # Keep one long-lived client; only reconnect when the target changes
+        # or the existing connection is no longer open
+        if self.storm_client is None:
+            self.storm_client = StormThriftClient(nimbus_host, nimbus_port)
+        
+        # Thrift I/O blocks, so keep it off the event loop. Switching targets
+        # happens inside the client's lock, never from here.
+        if await asyncio.to_thread(self.storm_client.ensure_connected, nimbus_host, nimbus_port):
+            return [types.TextContent(
+                type="text",
+                text=f"✅ Successfully connected to Storm cluster at {nimbus_host}:{nimbus_port}"
+            )]
+        else:
+            return [types.TextContent(
+                type="text",
+                text=f"❌ Failed to connect to Storm cluster at {nimbus_host}:{nimbus_port}. Make sure Storm Nimbus is running and thrift bindings are available."
+            )]
+    
+    async def _get_cluster_info(self) -> List[types.TextContent]:
+        """Get cluster information"""
+        if not self.storm_client:
+            return [types.TextContent(
+                type="text",
+                text="❌ Not connected to Storm cluster. Use connect_storm_cluster first."
+            )]
+        
+        cluster_info = await asyncio.to_thread(self.storm_client.get_cluster_summary)
+        
+        if "error" in cluster_info:
+            return [types.TextContent(
+                type="text",
+                text=f"❌ Error getting cluster info: {cluster_info['error']}"
+            )]
+        
+        # Format cluster information
+        parts = [f"""🌩️ **Storm Cluster Information**
+
+**Cluster Overview:**
+- Supervisors: {cluster_info['supervisors']}
+- Nimbus Uptime: {cluster_info['nimbus_uptime']} seconds
+
+**Active Topologies ({len(cluster_info['topologies'])}):**
+"""]
+        
+        # Format each topology straight from the thrift structs
+        parts.extend(self.storm_client.iter_topology_lines(cluster_info['topologies']))
+        result = "".join(parts)
+        
+        return [types.TextContent(type="text", text=result)]
+    
+    async def _storm_troubleshoot(self, arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """Provide troubleshooting guidance"""
+        issue_type = arguments["issue_type"]
+        symptoms = arguments["symptoms"]
+        
+        header, body = _lookup_case_insensitive(
+            _TROUBLESHOOTING_RENDERED, issue_type, _DEFAULT_TROUBLESHOOTING_RENDERED)
+        result = f"{header}{symptoms}{body}"
+        
+        return [types.TextContent(type="text", text=result)]
+    
+    async def _storm_best_practices(self, arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """Provide best practices guidance"""
+        category = arguments["category"]
+        
+        result = _lookup_case_insensitive(
+            _BEST_PRACTICES_RENDERED, category, _DEFAULT_BEST_PRACTICES_RENDERED)
+        
+        return [types.TextContent(type="text", text=result)]
+    
+    async def _generate_storm_topology(self, arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """Generate sample Storm topology code"""
+        topology_type = arguments["topology_type"].lower()
+        language = arguments.get("language", "Java").lower()
+        requirements = arguments.get("requirements", "")
+        
+        if language == "java" and topology_type == "word_count":
+            code = _WORDCOUNT_JAVA
+        else:
+            # Generic template
+            code = _GENERIC_TOPOLOGY_TEMPLATE.substitute(
+                title=topology_type.title(),
+                language=language.title(),
+                requirements=requirements,
+                topology_type=topology_type,
+                class_name=topology_type.title().replace('_', ''),
+            )
         
         result = f"""🌩️ **Generated {topology_type.title()} Storm Topology ({language.title()})**
 
@@ -637,6 +868,8 @@ public class {topology_type.title().replace('_', '')}Topology {{
     
     async def run(self):
         """Run the MCP server"""
+        # Responses are encoded by the stdio transport with pydantic-core's
+        # native JSON serializer (model_dump_json), not the stdlib json module
         async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
             # Create capabilities with tools support
             capabilities = types.ServerCapabilities(